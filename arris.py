@@ -531,9 +531,14 @@ def _run_tests():
     import doctest
     import sys
 
-    fail_count, test_count = doctest.testmod(report=True)
-    if fail_count:
-        raise SystemExit("%d out of %d doc tests failed" % (fail_count, test_count))
+    if sys.flags.optimize >= 2:
+        # The doc strings - and with them the tests - have been stripped
+        raise SystemExit("Doc tests are unavailable under python -OO")
+    runner = doctest.DocTestRunner(verbose=False, optionflags=doctest.ELLIPSIS)
+    for test in doctest.DocTestFinder().find(sys.modules[__name__]):
+        runner.run(test)
+    if runner.failures:
+        raise SystemExit("%d out of %d doc tests failed" % (runner.failures, runner.tries))
     print("%s: Doc tests were all OK" % sys.argv[0])
 
 if __name__ == "__main__":
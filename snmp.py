@@ -7,8 +7,14 @@ and retrieving SNMP OIDs in a pythonic way.
 See also: https://tools.ietf.org/html/rfc3781
 
 """
+import contextlib
 import datetime
 import enum
+import functools
+import ipaddress
+import re
+import struct
+import sys
 import textwrap
 import warnings
 
@@ -57,12 +63,14 @@ class IPProtocol(HumaneEnum):
         True
         >>> IPProtocol.TCP.overlaps(IPProtocol.BOTH)
         True
+        >>> IPProtocol.TCP.overlaps("TCP")
+        Traceback (most recent call last):
+        ...
+        TypeError: overlaps() expects an IPProtocol instance
         """
         if not isinstance(other, IPProtocol):
             raise TypeError("overlaps() expects an IPProtocol instance")
-        if self == other:
-            return True
-        return IPProtocol.BOTH in [self, other]
+        return self is other or self is IPProtocol.BOTH or other is IPProtocol.BOTH
 
 class AttributeStatus(HumaneEnum):
     """Current status of attributes.
@@ -74,9 +82,26 @@ class AttributeStatus(HumaneEnum):
     OK = 1
     UNSET = 2
     "We have yet to read it, and we have no value to write"
-    NEEDS_WRITE = 2
+    NEEDS_WRITE = 4
     NEEDS_READ = 3
 
+class _LazyDoc:
+    """Defers building the doc string of an attribute until it is needed.
+
+    Attribute doc strings are only read by help() and friends, so there
+    is no point in formatting one for every attribute created. On the
+    class, this is simply the class doc string.
+    """
+    def __init__(self, class_doc):
+        self._class_doc = class_doc
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self._class_doc
+        if instance._built_doc is None:
+            instance._built_doc = instance._make_doc()
+        return instance._built_doc
+
 class RawAttribute:
     """An abstraction of an SNMP attribute.
 
@@ -85,12 +110,22 @@ class RawAttribute:
     to the hub.
 
     For convenience, the value will be cached so repeated reads can be
-    done without needing multiple round-trips to the hub.
+    done without needing multiple round-trips to the hub. The cache
+    lives in the instance's __dict__ under the attribute name, so
+    several instances can share the same attribute object.
 
     This allows you to read/write the 'raw' values. For most use cases
     you probably want to use the Attribute class, as this can do
     translation.
     """
+    __doc__ = _LazyDoc(__doc__)
+    __slots__ = ('_oid', '_name', '_datatype', '_status', '_value',
+                 '_readback_after_write', '_built_doc')
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.__doc__ = _LazyDoc(cls.__dict__.get('__doc__'))
+
     def __init__(self,
                  oid,
                  datatype,
@@ -99,52 +134,101 @@ class RawAttribute:
                  instance=None,
                  readback_after_write=True):
         self._oid = oid
+        self._name = oid
         self._datatype = datatype
         self._status = status
         self._value = value
         self._readback_after_write = readback_after_write
-        self.__doc__ = "SNMP Attribute {0}, assumed to be datatype {1}".format(oid, datatype.name)
+        self._built_doc = None
         if self._status == AttributeStatus.NEEDS_WRITE and instance is None:
             raise TypeError("When creating attributes with NEEDS_WRITE, "
                             "instance value is mandatory")
 
         if self._status == AttributeStatus.NEEDS_WRITE:
             self._write(instance, value)
+            # The value is now what the hub has, for every instance
+            self._value = value
+            self._status = AttributeStatus.OK
+
+    def __set_name__(self, owner, name):
+        self._name = name
+
+    def _make_doc(self):
+        return "SNMP Attribute {0}, assumed to be datatype {1}".format(self._oid,
+                                                                        self._datatype.name)
 
     @property
     def oid(self):
         """The SNMP Object Identifier"""
         return self._oid
 
+    def oid_of(self, instance):
+        """The SNMP Object Identifier of the attribute in the given instance"""
+        return self._oid
+
     @property
     def datatype(self):
         """The Data Type - one of the DataType enums"""
         return self._datatype
 
+    def needs_read(self, instance):
+        """True if the value must be retrieved from the hub before use"""
+        return self._status == AttributeStatus.NEEDS_READ \
+            and self._name not in instance.__dict__
+
     def reread(self, instance):
         """Re-read the value from the hub"""
-        self._value = instance.snmp_get(self._oid)
-        self._status = AttributeStatus.OK
+        self._store(instance, instance.snmp_get(self.oid_of(instance)))
+
+    def _store(self, instance, value):
+        """Cache a value which is known to be what the hub has.
+
+        Subclasses may override this to cache something derived from
+        the SNMP value instead: Whatever ends up in the cache is what
+        reads of the attribute will return.
+        """
+        instance.__dict__[self._name] = value
 
     def __get__(self, instance, owner):
-        if self._status == AttributeStatus.NEEDS_READ:
-            self.reread(instance)
-        elif self._status == AttributeStatus.UNSET:
-            raise AttributeError("OID '{0}' has not yet been set".format(self._oid))
-        return self._value
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self._name]
+        except KeyError:
+            pass
+        if self._status == AttributeStatus.OK:
+            self._store(instance, self._value)
+        elif self._status != AttributeStatus.NEEDS_READ:
+            raise AttributeError("OID '{0}' has not yet been set".format(self.oid_of(instance)))
+        else:
+            batch = getattr(instance, '_snmp_batch', None)
+            if batch is not None and batch.is_queued(instance, self):
+                batch.flush()
+            if self._name not in instance.__dict__:
+                self.reread(instance)
+        return instance.__dict__[self._name]
+
+    def verify_readback(self, instance, value, readback):
+        """Check that the hub accepted a value we wrote to it"""
+        # Both are normally SNMP strings already, so only stringify
+        # when a plain comparison fails
+        if readback != value and str(readback) != str(value):
+            raise ValueError("hub did not accept a value of '{value}' for {oid}: "
+                             "It read back as '{rb}'!?"
+                             .format(value=value,
+                                     oid=self.oid_of(instance),
+                                     rb=readback))
 
     def _write(self, instance, value):
-        instance.snmp_set(self._oid, value, self._datatype)
+        oid = self.oid_of(instance)
+        instance.snmp_set(oid, value, self._datatype)
         if self._readback_after_write:
-            readback = instance.snmp_get(self._oid)
-            if str(readback) != str(value):
-                raise ValueError("hub did not accept a value of '{value}' for {oid}: "
-                                 "It read back as '{rb}'!?"
-                                 .format(value=value,
-                                         oid=self._oid,
-                                         rb=readback))
-        self._value = value
-        self._status = AttributeStatus.OK
+            batch = getattr(instance, '_snmp_batch', None)
+            if batch is not None:
+                batch.queue_readback(instance, self, value)
+            else:
+                self.verify_readback(instance, value, instance.snmp_get(oid))
+        self._store(instance, value)
 
     __set__ = _write
 
@@ -155,6 +239,183 @@ class RawAttribute:
         return "{s.__class__.__name__}({s._oid}, {s._datatype}, {s._status}, {s._value}" \
             .format(s=self)
 
+class _DoctestHub:
+    """A stand-in for the hub in doc tests.
+
+    The SNMP values live in a dict, and every request is printed, so
+    the tests can see how many round-trips are made. Sets of the OIDs
+    in rejects are ignored, as the hub does with values it does not
+    like.
+    """
+    def __init__(self, values, rejects=()):
+        self.values = dict(values)
+        self.rejects = set(rejects)
+
+    def snmp_get(self, oid):
+        print("get", oid)
+        return self.values[oid]
+
+    def snmp_gets(self, oids):
+        print("gets", *oids)
+        return {oid: self.values[oid] for oid in oids if oid in self.values}
+
+    def snmp_set(self, oid, value=None, datatype=None):
+        print("set", oid, value)
+        if oid not in self.rejects:
+            self.values[oid] = value
+
+    def snmp_walk(self, oid):
+        print("walk", oid)
+        return {key: value for key, value in self.values.items()
+                if key.startswith(oid + '.')}
+
+class Batch:
+    """Coalesces SNMP reads for an object into as few round-trips as possible.
+
+    Talking to the hub is slow, so reading attributes one at a time
+    quickly adds up. Attributes queued with read() are retrieved with
+    a single snmp_gets() call when the batch is flushed - which happens
+    on the first access to any of them, on an explicit flush(), or when
+    leaving the batch as a context manager.
+
+    The hub only accepts one OID per SNMP Set, so writes done while the
+    batch is active are still sent straight away. The read-back
+    verification of those writes is however postponed, and done as
+    part of the flush.
+
+        with snmp.Batch(hub) as batch:
+            batch.read("hardware_version", "firmware_version")
+            hub.name = "Hub"
+            print(hub.hardware_version)   # Both reads in one go
+
+    >>> class Hub(_DoctestHub):
+    ...     name = RawAttribute("1.1", DataType.STRING)
+    ...     serial = RawAttribute("1.2", DataType.STRING)
+    >>> hub = Hub({"1.1": "Hub", "1.2": "1234"})
+
+    Queued reads are done together, on the first access to any of them:
+
+    >>> with Batch(hub) as batch:
+    ...     batch.read("name", "serial")
+    ...     hub.serial
+    gets 1.1 1.2
+    '1234'
+    >>> hub.name
+    'Hub'
+
+    Writes are sent at once, but verified when the batch is flushed:
+
+    >>> with Batch(hub):
+    ...     hub.name = "Home"
+    ...     print("end of block")
+    set 1.1 Home
+    end of block
+    gets 1.1
+
+    A value the hub did not accept is not left in the cache:
+
+    >>> hub.rejects.add("1.1")
+    >>> with Batch(hub):
+    ...     hub.name = "Away"
+    Traceback (most recent call last):
+    ...
+    ValueError: hub did not accept a value of 'Away' for 1.1: It read back as 'Home'!?
+    >>> hub.name
+    get 1.1
+    'Home'
+
+    """
+    def __init__(self, instance):
+        self._instance = instance
+        self._reads = dict()
+        self._readbacks = dict()
+        self._previous = None
+
+    def read(self, *names):
+        """Queue the named attributes of the instance for reading.
+
+        Names which do not refer to SNMP attributes in need of reading
+        (e.g. plain properties, or attributes with a cached value) are
+        silently skipped.
+        """
+        owner = type(self._instance)
+        for name in names:
+            attr = getattr(owner, name, None)
+            if isinstance(attr, RawAttribute) and attr.needs_read(self._instance):
+                self._reads[attr.oid_of(self._instance)] = attr
+
+    def is_queued(self, instance, attr):
+        """True if the attribute is waiting for the batch to be flushed"""
+        return self._reads.get(attr.oid_of(instance)) is attr
+
+    def queue_readback(self, instance, attr, value):
+        """Postpone verifying that a write of value to attr was accepted.
+
+        The instance may be another object than the one the batch was
+        created for, as long as it talks to the same hub.
+        """
+        self._readbacks[attr.oid_of(instance)] = (instance, attr, value)
+
+    def flush(self):
+        """Perform all queued reads and read-back verifications"""
+        reads, self._reads = self._reads, dict()
+        readbacks, self._readbacks = self._readbacks, dict()
+        if not reads and not readbacks:
+            return
+        oids = list(reads) + [oid for oid in readbacks if oid not in reads]
+        values = self._instance.snmp_gets(oids)
+        for oid, attr in reads.items():
+            if oid in values:
+                attr._store(self._instance, values[oid])
+        error = None
+        for oid, (instance, attr, value) in readbacks.items():
+            try:
+                attr.verify_readback(instance, value, values.get(oid))
+            except ValueError as exc:
+                # The value was cached when it was written: It must not
+                # outlive the discovery that the hub did not take it
+                instance.__dict__.pop(attr._name, None)
+                if error is None:
+                    error = exc
+        if error is not None:
+            raise error
+
+    def __enter__(self):
+        self._previous = getattr(self._instance, '_snmp_batch', None)
+        self._instance._snmp_batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._instance._snmp_batch = self._previous
+        if exc_type is None:
+            self.flush()
+        return False
+
+def prefetch(instance, names):
+    """Read several SNMP attributes of an object in a single round-trip.
+
+    The values are cached just as if they had been read one by one, so
+    subsequent attribute reads will not need to talk to the hub. Names
+    of anything but SNMP attributes still to be read are skipped.
+
+    >>> class Hub(_DoctestHub):
+    ...     name = RawAttribute("1.1", DataType.STRING)
+    ...     serial = RawAttribute("1.2", DataType.STRING)
+    ...     @property
+    ...     def label(self):
+    ...         return self.name + "/" + self.serial
+    >>> hub = Hub({"1.1": "Hub", "1.2": "1234"})
+    >>> prefetch(hub, ["name", "label", "serial"])
+    gets 1.1 1.2
+    >>> hub.label
+    'Hub/1234'
+    >>> prefetch(hub, ["name", "label", "serial"])
+
+    """
+    batch = Batch(instance)
+    batch.read(*names)
+    batch.flush()
+
 class Translator:
     """Base class for translators.
 
@@ -193,17 +454,22 @@ class EnumTranslator(Translator):
     def __init__(self, enumclass, snmp_datatype=DataType.STRING, doc=None):
         self.enumclass = enumclass
         self.snmp_datatype = snmp_datatype
+        self._by_value = {member.value: member for member in enumclass}
+        self._by_name = dict(enumclass.__members__)
         if doc:
             self.__doc__ = doc
 
     def snmp(self, python_value):
-        if not isinstance(python_value, self.enumclass):
-            python_value = self.enumclass[str(python_value)]
-
-        return python_value.value
+        if isinstance(python_value, self.enumclass):
+            return python_value.value
+        return self._by_name[str(python_value)].value
 
     def pyvalue(self, snmp_value):
-        return self.enumclass(snmp_value)
+        try:
+            return self._by_value[snmp_value]
+        except KeyError:
+            # Let the enum raise its usual ValueError
+            return self.enumclass(snmp_value)
     @property
     def name(self):
         """The string name of the python constant"""
@@ -213,20 +479,40 @@ class EnumTranslator(Translator):
     __repr__ = __str__
 
 class BoolTranslator(Translator):
-    "Translates python boolean values to/from the router's representation"
+    """Translates python boolean values to/from the router's representation
+
+    >>> BoolTranslator.snmp(True)
+    '1'
+    >>> BoolTranslator.snmp(None)
+    '2'
+    >>> BoolTranslator.snmp("False")
+    '2'
+    >>> BoolTranslator.snmp("yes")
+    '1'
+    >>> BoolTranslator.pyvalue("1")
+    True
+    >>> BoolTranslator.pyvalue("2")
+    False
+    """
     snmp_datatype = DataType.INT
+    _snmp_values = {True: "1", False: "2", None: "2", "true": "1", "false": "2"}
+
     @staticmethod
     def snmp(python_value):
+        try:
+            return BoolTranslator._snmp_values[python_value]
+        except (KeyError, TypeError):
+            pass
         if isinstance(python_value, str) and python_value.lower() == "false":
             return "2"
         return "1" if python_value else "2"
     @staticmethod
     def pyvalue(snmp_value):
+        if snmp_value == "1":
+            return True
         if snmp_value is None:
             raise ValueError("This could not have come from SNMP...")
-        if snmp_value is None:
-            raise ValueError("This could not have come from SNMP...")
-        return snmp_value == "1"
+        return False
 
 # pylint: disable=invalid-name
 IPVersionTranslator = EnumTranslator(IPVersion)
@@ -240,6 +526,12 @@ def _dummy_for_doctest():
     'IPv6'
     >>> IPVersionTranslator.snmp(IPVersion.IPv4)
     '1'
+    >>> IPVersionTranslator.snmp("IPv6")
+    '2'
+    >>> IPVersionTranslator.pyvalue("3")
+    Traceback (most recent call last):
+    ...
+    ValueError: '3' is not a valid IPVersion
     """
 
 IPProtocolTranslator = EnumTranslator(IPProtocol, snmp_datatype=DataType.INT)
@@ -284,6 +576,8 @@ class IntTranslator(Translator):
 
         >>> IntTranslator.pyvalue("7")
         7
+        >>> IntTranslator.pyvalue(0)
+        0
 
         """
         if snmp_value == "":
@@ -334,8 +628,24 @@ class MacAddressTranslator(Translator):
     def snmp(python_value):
         if python_value is None:
             return '$000000000000'
+        if isinstance(python_value, netaddr.EUI):
+            return '$' + python_value.packed.hex()
         return "${0:012x}".format(int(python_value))
 
+# The hub represents IP addresses as a dollar sign followed by hex digits
+_is_hex_address = re.compile(r'\$[0-9a-fA-F]+').fullmatch
+
+@functools.lru_cache(maxsize=1024)
+def _parse_ip(value, version=None):
+    """netaddr.IPAddress(), memoized: Only used for translating, so the
+    result is never handed out.
+
+    This also understands the ipaddress module's address objects.
+    """
+    if isinstance(value, (ipaddress.IPv4Address, ipaddress.IPv6Address)):
+        return netaddr.IPAddress(int(value), value.version)
+    return netaddr.IPAddress(value, version)
+
 class IPv4Translator(Translator):
     """Handles translation of IPv4 addresses to/from the hub.
 
@@ -347,6 +657,8 @@ class IPv4Translator(Translator):
 
     >>> IPv4Translator.snmp('192.168.4.100')
     '$c0a80464'
+    >>> IPv4Translator.snmp(ipaddress.IPv4Address('192.168.4.100'))
+    '$c0a80464'
     >>> IPv4Translator.pyvalue("$c0a80464")
     IPAddress('192.168.4.100')
     >>> IPv4Translator.pyvalue("$c0a80464").version
@@ -358,11 +670,11 @@ class IPv4Translator(Translator):
         if python_value is None:
             return "$00000000"
         if not isinstance(python_value, netaddr.IPAddress):
-            python_value = netaddr.IPAddress(python_value, 4)
+            python_value = _parse_ip(python_value, 4)
         if python_value.version != 4:
             raise ValueError("%s is not an IPv4 address" % python_value)
 
-        return '$' + ''.join(["{0:02x}".format(w) for w in python_value.words])
+        return '$' + python_value.packed.hex()
 
     @staticmethod
     def pyvalue(snmp_value):
@@ -371,10 +683,15 @@ class IPv4Translator(Translator):
             return None
         if not snmp_value.startswith("$") or len(snmp_value) != 9:
             raise ValueError("Value '%s' is not an SNMP IPv4Address" % snmp_value)
-        if {x for x in snmp_value[1:]} == set('0'):   # All zeros
+        return IPv4Translator._decode(snmp_value)
+
+    @staticmethod
+    def _decode(snmp_value):
+        "pyvalue() for values already known to be '$' followed by 8 hex digits"
+        if not snmp_value[1:].strip('0'):   # All zeros
             return None
 
-        return netaddr.IPAddress(int(snmp_value[1:], 16))
+        return netaddr.IPAddress(int.from_bytes(bytes.fromhex(snmp_value[1:]), 'big'))
 
 class IPv6Translator(Translator):
     """The router encodes IPv6 address in hex, prefixed by a dollar sign.
@@ -402,10 +719,12 @@ class IPv6Translator(Translator):
         if python_value is None:
             return "$00000000000000000000000000000000"
         if not isinstance(python_value, netaddr.IPAddress):
-            python_value = netaddr.IPAddress(python_value, 6)
+            python_value = _parse_ip(python_value, 6)
         if python_value.version != 6:
             raise ValueError("%s is not an IPv6 address" % python_value)
 
+        # Each 16 bit word is deliberately formatted as (at least) 2
+        # hex digits, so this cannot simply be python_value.packed.hex()
         return '$' + ''.join(["{0:02x}".format(w) for w in python_value.words])
 
     @staticmethod
@@ -414,8 +733,12 @@ class IPv6Translator(Translator):
             return None
         if not snmp_value.startswith('$') or not 8 < len(snmp_value) <= 33:
             raise ValueError("Value '%s' is not an SNMP IPv6Address" % snmp_value)
+        return IPv6Translator._decode(snmp_value)
 
-        if {x for x in snmp_value[1:]} == set('0'):   # All zeros
+    @staticmethod
+    def _decode(snmp_value):
+        "pyvalue() for values already known to be '$' followed by 8-32 hex digits"
+        if not snmp_value[1:].strip('0'):   # All zeros
             return None
 
         res = netaddr.IPAddress(int(snmp_value[1:], 16), 6)
@@ -443,6 +766,8 @@ class IPAddressTranslator(Translator):
     4
     >>> IPAddressTranslator.snmp("::1")
     '$0000000000000001'
+    >>> IPAddressTranslator.snmp(ipaddress.ip_address("::1"))
+    '$0000000000000001'
     >>> IPAddressTranslator.pyvalue('$00000000000000000000000000000001')
     IPAddress('::1')
     >>> IPAddressTranslator.pyvalue('$00000000000000000000000000000001').version
@@ -453,12 +778,17 @@ class IPAddressTranslator(Translator):
     IPAddress('::c:fd8:400f:f558:0')
     >>> IPAddressTranslator.snmp(netaddr.IPAddress('::c:fd8:400f:f558:0'))
     '$0000000cfd8400ff55800'
+    >>> IPAddressTranslator.pyvalue('$c0a8046g')
+    Traceback (most recent call last):
+    ...
+    ValueError: $c0a8046g is not an SNMP representation of an IP address!?
     """
     @staticmethod
     def snmp(python_value):
         if python_value is None:
             return "$00000000"
-        python_value = netaddr.IPAddress(python_value)
+        if not isinstance(python_value, netaddr.IPAddress):
+            python_value = _parse_ip(python_value)
         if python_value.version == 4:
             return IPv4Translator.snmp(python_value)
         return IPv6Translator.snmp(python_value)
@@ -467,11 +797,12 @@ class IPAddressTranslator(Translator):
     def pyvalue(snmp_value):
         if snmp_value == "":
             return None
-        if not snmp_value.startswith("$") or len(snmp_value) < 9:
-            return ValueError("%s is not an SNMP representation of an IP address!?" % snmp_value)
-        if len(snmp_value) == 9:
-            return IPv4Translator.pyvalue(snmp_value)
-        return IPv6Translator.pyvalue(snmp_value)
+        length = len(snmp_value)
+        if not 9 <= length <= 33 or not _is_hex_address(snmp_value):
+            raise ValueError("%s is not an SNMP representation of an IP address!?" % snmp_value)
+        if length == 9:
+            return IPv4Translator._decode(snmp_value)
+        return IPv6Translator._decode(snmp_value)
 
 class DateTimeTranslator(Translator):
     """
@@ -493,6 +824,10 @@ class DateTimeTranslator(Translator):
 
     >>> DateTimeTranslator.pyvalue('')
 
+    >>> DateTimeTranslator.pyvalue('$07e2')
+    Traceback (most recent call last):
+    ...
+    ValueError: Value '$07e2' is not an SNMP DateTime
     >>> DateTimeTranslator.snmp(datetime.datetime(2018, 3, 14, 16, 7, 17))
     '$07e2030e10071100'
 
@@ -500,17 +835,17 @@ class DateTimeTranslator(Translator):
     '$0000000000000000'
 
     """
+    _fields = struct.Struct(">HBBBBB")
+
     @staticmethod
     def pyvalue(snmp_value):
         if snmp_value is None or snmp_value in ["", "$0000000000000000"]:
             return None
-        year = int(snmp_value[1:5], base=16)
-        month = int(snmp_value[5:7], base=16)
-        dom = int(snmp_value[7:9], base=16)
-        hour = int(snmp_value[9:11], base=16)
-        minute = int(snmp_value[11:13], base=16)
-        second = int(snmp_value[13:15], base=16)
-        return datetime.datetime(year, month, dom, hour, minute, second)
+        if not snmp_value.startswith('$') or len(snmp_value) < 15:
+            raise ValueError("Value '%s' is not an SNMP DateTime" % snmp_value)
+        # Decode all the fields in one go, rather than one int() each
+        return datetime.datetime(
+            *DateTimeTranslator._fields.unpack(bytes.fromhex(snmp_value[1:15])))
 
     @staticmethod
     def snmp(python_value):
@@ -520,9 +855,12 @@ class DateTimeTranslator(Translator):
         if not isinstance(python_value, datetime.datetime):
             raise TypeError("DateTimeTranslator.snmp takes a datetime.datetime arg")
 
-        return '$' + \
-            "{p.year:04x}{p.month:02x}{p.day:02x}" \
-            "{p.hour:02x}{p.minute:02x}{p.second:02x}00".format(p=python_value)
+        return '$' + DateTimeTranslator._fields.pack(python_value.year,
+                                                     python_value.month,
+                                                     python_value.day,
+                                                     python_value.hour,
+                                                     python_value.minute,
+                                                     python_value.second).hex() + '00'
 
 class RowStatus(HumaneEnum):
     """SNMIv2 Row Status values
@@ -567,6 +905,8 @@ class Attribute(RawAttribute):
     between Python values and router representation.
 
     """
+    __slots__ = ('_translator', '_to_py', '_to_snmp', '_doc')
+
     def __init__(self,
                  oid,
                  translator=NullTranslator,
@@ -576,23 +916,11 @@ class Attribute(RawAttribute):
                  doc=None,
                  readback_after_write=True):
         self._translator = translator
-        try:
-            translator_name = translator.__name__
-        except AttributeError:
-            try:
-                translator_name = translator.__class__.__name__
-            except AttributeError:
-                translator_name = translator.name
-
-        if doc:
-            self.__doc__ = textwrap.dedent(doc) + \
-                "\n\nCorresponds to SNMP attribute {0}, translated by {1}" \
-                .format(oid, translator_name)
-        else:
-            self.__doc__ = "SNMP Attribute {0}, as translated by {1}" \
-                .format(oid, translator_name)
+        self._to_py = translator.pyvalue
+        self._to_snmp = translator.snmp
+        self._doc = doc
 
-        if status == AttributeStatus.NEEDS_READ:
+        if status in (AttributeStatus.NEEDS_READ, AttributeStatus.UNSET):
             RawAttribute.__init__(self,
                                   oid=oid,
                                   datatype=translator.snmp_datatype,
@@ -608,22 +936,69 @@ class Attribute(RawAttribute):
                                   value=translator.snmp(value),
                                   readback_after_write=readback_after_write)
 
-    def __get__(self, instance, owner):
-        return self._translator.pyvalue(RawAttribute.__get__(self, instance, owner))
+    def _make_doc(self):
+        translator_name = getattr(self._translator, '__name__',
+                                  self._translator.__class__.__name__)
+        if self._doc:
+            return textwrap.dedent(self._doc) + \
+                "\n\nCorresponds to SNMP attribute {0}, translated by {1}" \
+                .format(self._oid, translator_name)
+        return "SNMP Attribute {0}, as translated by {1}" \
+            .format(self._oid, translator_name)
+
+    def _store(self, instance, value):
+        # Cache the translated value, so only the first read pays for
+        # the translation
+        instance.__dict__[self._name] = self._to_py(value)
 
     def __set__(self, instance, value):
-        return RawAttribute.__set__(self, instance, self._translator.snmp(value))
+        return RawAttribute.__set__(self, instance, self._to_snmp(value))
 
     def __str__(self):
         return "{s.__class__.__name__}({s._oid}, {s._translator}, {s._status}, {s._value}" \
             .format(s=self)
 
+class ColumnAttribute(Attribute):
+    """An Attribute representing a column in an SNMP table.
+
+    A single ColumnAttribute is shared by all the rows of a table: The
+    OID it is given is that of the column, and the full OID is found by
+    appending the ID of the row it is accessed through.
+
+    Rows which have no value for the column will raise AttributeError.
+
+    """
+    __slots__ = ()
+
+    def __init__(self,
+                 oid,
+                 translator=NullTranslator,
+                 doc=None,
+                 readback_after_write=True):
+        super().__init__(oid=oid,
+                         translator=translator,
+                         status=AttributeStatus.UNSET,
+                         doc=doc,
+                         readback_after_write=readback_after_write)
+
+    def oid_of(self, instance):
+        return self._oid + '.' + instance.row_id
+
+    def reread(self, instance):
+        Attribute.reread(self, instance)
+        instance._touch()
+
+    def __set__(self, instance, value):
+        Attribute.__set__(self, instance, value)
+        instance._touch()
+
 class TransportProxy:
-    """Forwards snmp_get/snmp_set calls to another class/instance."""
+    """Forwards snmp_get/snmp_gets/snmp_set calls to another class/instance."""
     def __init__(self, transport):
         """Create a TransportProxy which forwards to the given transport"""
         self._transport = transport
         self.snmp_get = transport.snmp_get
+        self.snmp_gets = transport.snmp_gets
         self.snmp_set = transport.snmp_set
         self.snmp_walk = transport.snmp_walk
 
@@ -634,9 +1009,23 @@ class TransportProxyDict(TransportProxy, dict):
 
 class RowBase(TransportProxy):
     """Base class for representing SNMP Tables"""
-    def __init__(self, proxy, keys):
+    def __init__(self, proxy, keys, row_id=None):
         super().__init__(proxy)
         self._keys = keys
+        self._row_id = row_id
+        self._row_version = 0
+
+    @property
+    def row_id(self):
+        """The ID of the row - i.e. the part of the OIDs after the column"""
+        return self._row_id
+
+    def _touch(self):
+        """Note that a column of the row has been written to"""
+        self._row_version += 1
+        touch_table = getattr(self._transport, '_touch', None)
+        if touch_table is not None:
+            touch_table()
 
     def keys(self):
         return self._keys
@@ -664,32 +1053,44 @@ class RowBase(TransportProxy):
     def __contains__(self, item):
         return item in self._keys
 
-    def __str__(self):
+    def _format(self, formatter):
         return self.__class__.__name__ + '(' \
-            + ', '.join(["{0}={1}".format(key, str(getattr(self, key)))
-                         for key in self._keys]) \
+            + ', '.join(["{0}={1}".format(key, formatter(value))
+                         for key, value in self.items()]) \
             + ')'
 
+    def __str__(self):
+        return self._format(str)
+
     def __repr__(self):
-        return self.__class__.__name__ + '(' \
-            + ', '.join(["{0}={1}".format(key, repr(getattr(self, key)))
-                         for key in self._keys]) \
-            + ')'
+        return self._format(repr)
 
-def parse_table(table_oid, walk_result):
-    """Restructure the result of an SNMP table into rows and columns
+_MISSING = object()
+
+def iter_cells(table_oid, walk_result):
+    """Iterate over the cells in the result of an SNMP table walk.
+
+    This yields (row_id, column_id, raw_value) tuples, in the order of
+    the walk result.
+
+    >>> list(iter_cells("1.2", {"1.2.3.4": "a", "1.2.3.5.6": "b"}))
+    [('4', '3', 'a'), ('5.6', '3', 'b')]
 
     """
-    def column_id(oid):
-        return oid[len(table_oid)+1:].split('.')[0]
+    # The same handful of column and row IDs turn up over and over
+    # again: Interning them makes the dict lookups on them cheaper
+    intern = sys.intern
+    prefix_len = len(table_oid) + 1
+    for oid, raw_value in walk_result.items():
+        column_id, _, row_id = oid[prefix_len:].partition('.')
+        yield intern(row_id), intern(column_id), raw_value
 
-    def row_id(oid):
-        return '.'.join(oid[len(table_oid)+1:].split('.')[1:])
+def parse_table(table_oid, walk_result):
+    """Restructure the result of an SNMP table into rows and columns
 
+    """
     result_dict = dict()
-    for oid, raw_value in walk_result.items():
-        this_column_id = column_id(oid)
-        this_row_id = row_id(oid)
+    for this_row_id, this_column_id, raw_value in iter_cells(table_oid, walk_result):
         if this_row_id not in result_dict:
             result_dict[this_row_id] = dict()
         result_dict[this_row_id][this_column_id] = raw_value
@@ -749,6 +1150,15 @@ class Table(TransportProxyDict):
         super().__init__(transport)
         self._oid = table_oid
         self._row_class = row_class
+        # Bumped on every change, so formatted output can be reused
+        # until the table changes
+        self._version = 0
+        self._formatted = dict()
+        self._formatted_rows = dict()
+        # (key, row) of rows deleted inside batch(), while one is active
+        self._deferred = None
+        column_mapping = {sys.intern(column_id): mapping
+                          for column_id, mapping in column_mapping.items()}
         self._column_mapping = column_mapping
 
         if not walk_result:
@@ -757,49 +1167,38 @@ class Table(TransportProxyDict):
         if not walk_result:
             warnings.warn("SNMP Walk of '%s' yielded no results" % table_oid)
 
-        rawtable = parse_table(table_oid, walk_result)
-
-        result_dict = dict()
-        for row_id, row in rawtable.items():
-            result_dict[row_id] = dict()
-            for column_id, raw_value in row.items():
-                if not column_id in column_mapping:
-                    continue
-                result_dict[row_id][column_id] = (table_oid + '.' + column_id + '.' + row_id,
-                                                  raw_value,
-                                                  column_mapping[column_id])
-            if not result_dict[row_id]:
-                del result_dict[row_id]
-
-        # Then go through the result, and create a row object for each
-        # row. Essentially, each row is a different class, as it may
-        # have different attributes
-        for rowkey, row in result_dict.items():
-            # Build up the columns in the row
-            class_dict = {
-                mapping["name"]: Attribute(oid=oid,
-                                           translator=mapping.get('translator', NullTranslator),
-                                           instance=self,
-                                           value=mapping.get('translator',
-                                                             NullTranslator).pyvalue(raw_value),
-                                           status=AttributeStatus.OK,
-                                           readback_after_write=mapping.get("readback_after_write",
-                                                                            True),
-                                           doc=mapping.get('doc'))
-                for oid, raw_value, mapping in row.values()
-            }
-            if not class_dict:
-                # Empty rows are not interesting...
+        # All rows share the same class: Rows lacking some of the
+        # columns simply have no value for them
+        columns = [(column_id,
+                    mapping["name"],
+                    ColumnAttribute(
+                        oid=table_oid + '.' + column_id,
+                        translator=mapping.get('translator', NullTranslator),
+                        readback_after_write=mapping.get('readback_after_write', True),
+                        doc=mapping.get('doc')))
+                   for column_id, mapping in column_mapping.items()]
+        self._row_type = type('Row', (self._row_class,),
+                              {name: attr for _, name, attr in columns})
+
+        # Collect the values of the interesting columns in one pass
+        # over the walk: Rows without any of them never get created
+        rawtable = dict()
+        for row_id, column_id, raw_value in iter_cells(table_oid, walk_result):
+            if column_id not in column_mapping:
                 continue
-            # A litle trick: Redo it with a new dict, so we can get
-            # the order "right" - i.e. the order it is done in the
-            # mappings
-            class_dict = {column['name']: class_dict[column['name']]
-                          for column in column_mapping.values()
-                          if column['name'] in class_dict}
+            row = rawtable.get(row_id)
+            if row is None:
+                row = rawtable[row_id] = dict()
+            row[column_id] = raw_value
 
-            RowClass = type('Row', (self._row_class,), class_dict)
-            self[rowkey] = RowClass(self, class_dict)
+        for row_id, row in rawtable.items():
+            present = [(name, attr, row[column_id])
+                       for column_id, name, attr in columns
+                       if column_id in row]
+            therow = self._row_type(self, [name for name, _, _ in present], row_id)
+            for _, attr, raw_value in present:
+                attr._store(therow, raw_value)
+            self[row_id] = therow
 
         if not self:
             warnings.warn("SMTP walk of %s resulted in zero rows"
@@ -829,21 +1228,12 @@ class Table(TransportProxyDict):
                 raise TypeError("Invalid kwarg name '%s' - "
                                 "expected one of %s" % (arg, mapping_names))
 
-        rowclass_dict = {
-            mapping["name"]: Attribute(
-                oid=self.oid + '.' + column_oid + '.' + row_key,
-                doc=mapping.get('doc'),
-                instance=self,
-                value=kwargs[mapping["name"]],
-                status=AttributeStatus.NEEDS_WRITE,
-                translator=mapping.get('translator', NullTranslator),
-                readback_after_write=mapping.get('readback_after_write', True)
-            )
-            for column_oid, mapping in self._column_mapping.items()
-            if mapping["name"] in kwargs
-        }
-        RowClass = type('Row', (self._row_class,), rowclass_dict)
-        therow = RowClass(self, rowclass_dict)
+        keys = [mapping["name"]
+                for mapping in self._column_mapping.values()
+                if mapping["name"] in kwargs]
+        therow = self._row_type(self, keys, row_key)
+        for name in keys:
+            setattr(therow, name, kwargs[name])
 
         self[row_key] = therow
         return therow
@@ -864,8 +1254,43 @@ class Table(TransportProxyDict):
         This format is best suited for tables with a limited number of
         columns and/or wide terminals.
 
+        The result is reused until the table or one of its rows changes:
+
+        >>> hub = _DoctestHub({"1.2.1.1": "a", "1.2.1.2": "b"})
+        >>> table = Table(hub, "1.2", {"1": {"name": "letter"}})
+        walk 1.2
+        >>> print(table.format())
+        +--------+
+        | letter |
+        +--------+
+        | a      |
+        | b      |
+        +--------+
+        >>> table.format() is table.format()
+        True
+        >>> table["1"].letter = "x"
+        set 1.2.1.1 x
+        get 1.2.1.1
+        >>> print(table.format())
+        +--------+
+        | letter |
+        +--------+
+        | x      |
+        | b      |
+        +--------+
+        >>> table.update({"3": table.pop("1")})
+        >>> print(table.format())
+        +--------+
+        | letter |
+        +--------+
+        | b      |
+        | x      |
+        +--------+
+        >>> table.aslist() == (table["2"], table["3"])
+        True
+
         """
-        return utils.format_table(self)
+        return self._memoized('table', lambda: utils.format_table(self))
 
     def format_by_row(self):
         """Get a string representation of the table for human consumption.
@@ -874,8 +1299,59 @@ class Table(TransportProxyDict):
         next row etc.  This format is well suited for tables with many
         columns and/or narrow terminals.
 
+        The result is reused until the table or one of its rows changes:
+
+        >>> hub = _DoctestHub({"1.2.1.1": "a", "1.2.1.2": "b", "1.2.1.3": "c"})
+        >>> table = Table(hub, "1.2", {"1": {"name": "letter"}})
+        walk 1.2
+        >>> table.format_by_row()
+        'Row: 1\\n  letter : a\\n\\nRow: 2\\n  letter : b\\n\\nRow: 3\\n  letter : c\\n'
+        >>> hub.values["1.2.1.1"] = "z"
+        >>> type(table["1"]).letter.reread(table["1"])
+        get 1.2.1.1
+        >>> table.format_by_row()
+        'Row: 1\\n  letter : z\\n\\nRow: 2\\n  letter : b\\n\\nRow: 3\\n  letter : c\\n'
+        >>> del table["3"]
+        >>> table.format_by_row()
+        'Row: 1\\n  letter : z\\n\\nRow: 2\\n  letter : b\\n'
+        >>> table |= {"4": table.pop("1")}
+        >>> table.format_by_row()
+        'Row: 2\\n  letter : b\\n\\nRow: 4\\n  letter : z\\n'
+
+        """
+        return self._memoized('by_row', self._format_rows)
+
+    def _format_rows(self):
+        """The work behind format_by_row().
+
+        Each row is formatted separately, and only rows which have
+        changed since the last call are formatted again. Only the
+        current rows are remembered, so rows which are gone do not
+        linger.
         """
-        return utils.format_by_row(self)
+        formatted_rows = dict()
+        for rowkey, row in self.items():
+            cached = self._formatted_rows.get(rowkey)
+            if cached is None or cached[0] is not row or cached[1] != row._row_version:
+                cached = (row, row._row_version, utils.format_one_row(rowkey, row))
+            formatted_rows[rowkey] = cached
+        self._formatted_rows = formatted_rows
+        # Same layout as utils.format_by_row(): a blank line between rows
+        return "\n".join(text for _, _, text in formatted_rows.values())
+
+    def _memoized(self, name, render):
+        """Return render(), reusing the result if the table has not
+        changed since it was last produced"""
+        cached = self._formatted.get(name)
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+        res = render()
+        self._formatted[name] = (self._version, res)
+        return res
+
+    def _touch(self):
+        """Note that the table contents have changed"""
+        self._version += 1
 
     def aslist(self):
         """Get the rows as a list
@@ -883,22 +1359,190 @@ class Table(TransportProxyDict):
         This will 'lose' the ID of the rows, which most of the time is
         not a problem.
 
+        The result is a tuple, which is reused until the table changes.
+
         """
-        return self.values()
+        return self._memoized('aslist', lambda: tuple(dict.values(self)))
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        self._touch()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """Group row deletions, so the hub is only told at the end.
+
+        Rows deleted inside the with block disappear from the table
+        straight away, but the writes destroying them on the hub are
+        postponed until the block is left. They are then sent back to
+        back, with any read-back verification done in a single
+        round-trip. If the block raises an exception, the deleted rows
+        are put back (at the end of the table) and the hub is left
+        alone.
+
+            with table.batch():
+                for key in stale_keys:
+                    del table[key]
+
+        >>> hub = _DoctestHub({"1.2.1.1": "a", "1.2.1.2": "b", "1.2.1.3": "c",
+        ...                    "1.2.2.1": "1", "1.2.2.2": "1", "1.2.2.3": "1"})
+        >>> table = Table(hub, "1.2", {"1": {"name": "letter"},
+        ...                            "2": {"name": "rowstatus",
+        ...                                  "translator": RowStatusTranslator}})
+        walk 1.2
+        >>> with table.batch():
+        ...     del table["1"]
+        ...     with table.batch():
+        ...         del table["2"]
+        ...     print(list(table))
+        ['3']
+        set 1.2.2.1 6
+        set 1.2.2.2 6
+        gets 1.2.2.1 1.2.2.2
+        >>> with table.batch():
+        ...     del table["3"]
+        ...     raise RuntimeError("changed my mind")
+        Traceback (most recent call last):
+        ...
+        RuntimeError: changed my mind
+        >>> list(table)
+        ['3']
+
+        If the hub refuses to destroy a row, that row and those not yet
+        sent are put back, while the rows already destroyed stay gone:
+
+        >>> class FlakyHub(_DoctestHub):
+        ...     def snmp_set(self, oid, value=None, datatype=None):
+        ...         if oid == "1.2.2.2":
+        ...             raise OSError("hub went away")
+        ...         return super().snmp_set(oid, value, datatype)
+        >>> hub = FlakyHub({"1.2.1.1": "a", "1.2.1.2": "b", "1.2.1.3": "c",
+        ...                 "1.2.2.1": "1", "1.2.2.2": "1", "1.2.2.3": "1"})
+        >>> table = Table(hub, "1.2", {"1": {"name": "letter"},
+        ...                            "2": {"name": "rowstatus",
+        ...                                  "translator": RowStatusTranslator}})
+        walk 1.2
+        >>> try:
+        ...     with table.batch():
+        ...         for key in ["1", "2", "3"]:
+        ...             del table[key]
+        ... except OSError as exc:
+        ...     print(exc)
+        set 1.2.2.1 6
+        gets 1.2.2.1
+        hub went away
+        >>> list(table)
+        ['2', '3']
+
+        """
+        if self._deferred is not None:
+            # Nested: The outermost batch does the work
+            yield self
+            return
+        self._deferred = deferred = []
+        try:
+            yield self
+        except BaseException:
+            self._deferred = None
+            for key, row in deferred:
+                dict.__setitem__(self, key, row)
+            self._touch()
+            raise
+        self._deferred = None
+        if not deferred:
+            return
+        # Only the rows being destroyed need to see the batch
+        batch = Batch(deferred[0][1])
+        sent = 0
+        try:
+            for _, row in deferred:
+                row._snmp_batch = batch
+                try:
+                    self._destroy(row)
+                finally:
+                    del row._snmp_batch
+                sent += 1
+        except BaseException:
+            # The failing row, and those after it, are still on the hub
+            for key, row in deferred[sent:]:
+                dict.__setitem__(self, key, row)
+            self._touch()
+            batch.flush()
+            raise
+        batch.flush()
+
+    @staticmethod
+    def _destroy(row):
+        """Tell the hub to delete the row, if the row has a rowstatus
+
+        All rows of a table share one class, so the class having a
+        rowstatus attribute does not mean the row has a value for it:
+
+        >>> hub = _DoctestHub({"1.2.1.1": "a", "1.2.1.2": "b", "1.2.2.1": "1"})
+        >>> table = Table(hub, "1.2", {"1": {"name": "letter"},
+        ...                            "2": {"name": "rowstatus",
+        ...                                  "translator": RowStatusTranslator,
+        ...                                  "readback_after_write": False}})
+        walk 1.2
+        >>> del table["2"]
+        >>> del table["1"]
+        set 1.2.2.1 6
+
+        """
+        # Check the keys: No need to read the current value
+        if 'rowstatus' in row:
+            row.rowstatus = RowStatus.DESTROY
 
     def __delitem__(self, key):
-        if key in self and hasattr(self[key], 'rowstatus'):
-            self[key].rowstatus = RowStatus.DESTROY
+        row = dict.get(self, key, _MISSING)
+        if row is _MISSING:
+            raise KeyError(key)
+        if self._deferred is not None:
+            self._deferred.append((key, row))
+        else:
+            self._destroy(row)
         dict.__delitem__(self, key)
+        self._touch()
+
+    # The remaining dict mutators bypass __setitem__/__delitem__
+
+    def pop(self, *args):
+        self._touch()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self._touch()
+        return dict.popitem(self)
+
+    def clear(self):
+        self._touch()
+        dict.clear(self)
+
+    def update(self, *args, **kwargs):
+        self._touch()
+        dict.update(self, *args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        self._touch()
+        return dict.setdefault(self, key, default)
+
+    def __ior__(self, other):
+        self._touch()
+        dict.update(self, other)
+        return self
 
 
 def _run_tests():
     import doctest
-    import sys
 
-    fail_count, test_count = doctest.testmod(report=True)
-    if fail_count:
-        raise SystemExit("%d out of %d doc tests failed" % (fail_count, test_count))
+    if sys.flags.optimize >= 2:
+        # The doc strings - and with them the tests - have been stripped
+        raise SystemExit("Doc tests are unavailable under python -OO")
+    runner = doctest.DocTestRunner(verbose=False, optionflags=doctest.ELLIPSIS)
+    for test in doctest.DocTestFinder().find(sys.modules[__name__]):
+        runner.run(test)
+    if runner.failures:
+        raise SystemExit("%d out of %d doc tests failed" % (runner.failures, runner.tries))
     print("%s: Doc tests were all OK" % sys.argv[0])
 
 if __name__ == "__main__":
@@ -465,7 +465,9 @@ def _setup_properties(dirname):
             if 'doc' in settings:
                 kwargs['doc'] = settings['doc']
 
-            setattr(Hub, settings['name'], snmp.Attribute(**kwargs))
+            attr = snmp.Attribute(**kwargs)
+            attr.__set_name__(Hub, settings['name'])
+            setattr(Hub, settings['name'], attr)
         except Exception:
             warnings.warn("Problem with OID %s" % oid)
             raise